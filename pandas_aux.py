@@ -1,22 +1,54 @@
+import numpy as np
 import pandas as pd
-from openpyxl import Workbook
-from openpyxl.worksheet.table import Table, TableStyleInfo
-from openpyxl.utils.dataframe import dataframe_to_rows
-from openpyxl.styles import Font
+import xlsxwriter
 
 import os
 import re
 
-def excel_to_dataframe(file_path, sheet_name=None):
+try:
+    import python_calamine  # noqa: F401
+    _EXCEL_ENGINE = 'calamine'
+except ImportError:
+    _EXCEL_ENGINE = 'openpyxl'
+
+try:
+    import pyarrow  # noqa: F401
+    _STRING_DTYPE = 'string[pyarrow]'
+except ImportError:
+    _STRING_DTYPE = 'string'
+
+try:
+    from numba import njit, prange
+    _HAS_NUMBA = True
+except ImportError:
+    _HAS_NUMBA = False
+
+# Below this many rows, loading the numba kernel (~0.3s even when cached) costs more than it saves
+_NUMBA_MIN_ROWS = 100_000
+
+_RE_NONALNUM = re.compile(r'[^a-zA-Z0-9\s]')
+_RE_NONDIGIT = re.compile(r'\D')
+
+def excel_to_dataframe(file_path, sheet_name=None, *, usecols=None, dtype=None, nrows=None, skiprows=None, engine=None):
     """
     Reads an Excel sheet and converts it into a Pandas DataFrame.
+    Uses the calamine engine when python-calamine is installed, otherwise openpyxl.
 
     :param file_path: str - Path to the .xlsx file
     :param sheet_name: str (optional) - Name of the sheet to be read. If None, reads the first sheet.
+    :param usecols: (optional) - Columns to read, as accepted by pd.read_excel. Other columns are not parsed.
+    :param dtype: (optional) - Type name or dict of column -> type, as accepted by pd.read_excel.
+                  Columns given here (e.g. {'id': 'string'}) skip pandas' type inference.
+    :param nrows: int (optional) - Number of rows to read.
+    :param skiprows: (optional) - Rows to skip at the start of the sheet, as accepted by pd.read_excel.
+    :param engine: str (optional) - Engine passed to pd.read_excel. If None, uses calamine or openpyxl.
     :return: DataFrame - Content of the sheet in a Pandas DataFrame
     """
     try:
-        df = pd.read_excel(file_path, sheet_name=sheet_name, engine='openpyxl')
+        df = pd.read_excel(
+            file_path, sheet_name=sheet_name, engine=engine or _EXCEL_ENGINE,
+            usecols=usecols, dtype=dtype, nrows=nrows, skiprows=skiprows
+        )
         return df
     except Exception as e:
         print(f"Error reading Excel file: {e}")
@@ -38,39 +70,51 @@ def dataframe_to_excel(df, directory, file_name):
         # Define the FULL path of the file
         file_path = os.path.join(directory, file_name)
 
-        # Create Excel file
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "extracted_data"
+        # Create Excel file (infinite values are written as Excel errors instead of failing)
+        wb = xlsxwriter.Workbook(file_path, {'default_date_format': 'yyyy-mm-dd h:mm:ss', 'nan_inf_to_errors': True})
+        ws = wb.add_worksheet("extracted_data")
 
         # Add headers
-        ws.append(df.columns.tolist())
-        for cell in ws[1]:
-            cell.font = Font(bold=True)
-
-        # Add data
-        for row in dataframe_to_rows(df, index=False, header=False):
-            ws.append(row)
-
-        # Create formatted table in Excel
-        num_rows = len(df) + 1  # +1 to include header
-        table_ref = f"A1:{chr(65 + len(df.columns) - 1)}{num_rows}"
-        table = Table(displayName="DataTable", ref=table_ref)
-
-        style = TableStyleInfo(
-            name="TableStyleMedium9", showFirstColumn=False,
-            showLastColumn=False, showRowStripes=True, showColumnStripes=False
-        )
-        table.tableStyleInfo = style
-        ws.add_table(table)
-
-        # Auto-adjust column widths
-        for col in ws.columns:
-            max_length = max(len(str(cell.value)) for cell in col if cell.value)
-            ws.column_dimensions[col[0].column_letter].width = max_length + 2
+        header_format = wb.add_format({'bold': True})
+        ws.write_row(0, 0, [str(col) for col in df.columns], header_format)
+
+        # Add data (nulls are written as blank cells)
+        data = df.astype(object).where(df.notna(), None)
+
+        # Durations are written as fractions of a day with a duration format, not as dates
+        duration_format = wb.add_format({'num_format': '[h]:mm:ss'})
+        duration_cols = [i for i, dtype in enumerate(df.dtypes) if pd.api.types.is_timedelta64_dtype(dtype)]
+        for i in duration_cols:
+            durations = df.iloc[:, i]
+            data.isetitem(i, (durations / pd.Timedelta(days=1)).astype(object).where(durations.notna(), None))
+
+        for i, row in enumerate(data.itertuples(index=False, name=None), 1):
+            ws.write_row(i, 0, row)
+
+        # Create formatted table in Excel (xlsxwriter needs at least one data row)
+        if len(df) > 0:
+            result = ws.add_table(0, 0, len(df), len(df.columns) - 1, {
+                'name': 'DataTable',
+                'style': 'Table Style Medium 9',
+                'columns': [{'header': str(col), 'header_format': header_format} for col in df.columns],
+            })
+            if result is not None and result < 0:  # xlsxwriter warns and returns a negative code instead of raising
+                raise ValueError("Could not create the Excel table (column names must be unique, ignoring case).")
+
+        # Auto-adjust column widths (capped at 80 characters)
+        for i, header in enumerate(df.columns):
+            values = df.iloc[:, i].dropna()
+            if values.empty:
+                width = 0
+            elif pd.api.types.is_integer_dtype(values.dtype):
+                width = max(len(str(values.min())), len(str(values.max())))  # Widest integers are at the extremes
+            else:
+                width = values.astype(str).str.len().max()
+            ws.set_column(i, i, min(max(len(str(header)), width), 80) + 2,
+                          duration_format if i in duration_cols else None)
 
         # Save the file
-        wb.save(file_path)
+        wb.close()
 
         return file_path  # Return the correct path of the generated file
 
@@ -78,7 +122,24 @@ def dataframe_to_excel(df, directory, file_name):
         print(f"Error exporting to Excel: {e}")
         return None    
 
-def remove_duplicates(df, column: str):
+def _select_rows(df, mask, copy: bool = False):
+    """
+    Selects the rows of the DataFrame where the mask is True.
+    If every row is kept, the rows are not gathered into a new DataFrame.
+
+    :param df: The original DataFrame.
+    :param mask: Boolean Series aligned with the DataFrame. Missing values (<NA>) count as False.
+    :param copy: If False, the result may share data with the original DataFrame.
+    :return: DataFrame with the selected rows.
+    """
+    # Comparisons on nullable columns (string, Int64, ...) give <NA> where the value is missing;
+    # mask.all() would skip those, so they must be turned into False before the check
+    mask = mask.fillna(False).astype(bool)
+    if mask.all():
+        return df.copy(deep=copy)
+    return df[mask]
+
+def remove_duplicates(df, column: str, copy: bool = False):
     """
     Removes duplicates from the DataFrame based on the values of a specific column.
 
@@ -90,6 +151,9 @@ def remove_duplicates(df, column: str):
     column : str
         The name of the column used as a reference to identify duplicates.
 
+    copy : bool, default False
+        If False and there are no duplicates, the result shares data with the original DataFrame.
+
     Returns:
     -------
     pd.DataFrame
@@ -98,7 +162,7 @@ def remove_duplicates(df, column: str):
     if column not in df.columns:
         raise ValueError(f"The column '{column}' does not exist in the DataFrame.")
 
-    df = df.drop_duplicates(subset=[column], keep='first')
+    df = _select_rows(df, ~df[column].duplicated(keep='first'), copy)
 
     return df
 
@@ -107,24 +171,51 @@ def strip_dataframe(df):
     Strips whitespace from the beginning and end of each string in the DataFrame.
 
     :param df: DataFrame to be processed.
-    :return: DataFrame with stripped strings.
+    :return: DataFrame with stripped strings. Non-string columns share data with the input,
+             so editing their cells in place also changes the input DataFrame.
     """
-    return df.apply(lambda col: col.str.strip() if col.dtypes == 'object' else col)
+    df = df.copy(deep=False)  # Stripped columns are replaced, the others keep sharing data
+    for col in df.select_dtypes(include=['object', 'string']).columns:
+        df[col] = df[col].str.strip()
+    return df
 
-def filter_dataframe(df, column, parameter):
+def build_filter_index(df, column):
+    """
+    Builds a lookup index of the row positions for each value of a column,
+    to be reused by filter_dataframe when filtering the same column many times.
+
+    :param df: DataFrame to be indexed.
+    :param column: Column name to index.
+    :return: Dict mapping each value of the column to an array of row positions,
+             or None if the column does not exist.
+    """
+    if column not in df.columns:
+        print(f"The column '{column}' does not exist in the DataFrame.")
+        return None
+
+    return df.groupby(column, sort=False, observed=True).indices
+
+def filter_dataframe(df, column, parameter, index=None, copy: bool = False):
     """
     Filters the DataFrame based on a specific column and parameter.
 
     :param df: DataFrame to be filtered.
     :param column: Column name to filter by.
     :param parameter: Parameter to filter the column.
+    :param index: dict (optional) - Index built by build_filter_index for the same DataFrame and column.
+                  If given, the matching rows are looked up instead of scanning the whole column.
+                  The lookup matches by exact hash/equality of the values, without the type coercion
+                  of ==: e.g. '2020-01-01' matches a datetime column without index, but not with it.
+    :param copy: If False and every row matches, the result shares data with the original DataFrame.
     :return: Filtered DataFrame or None if the column does not exist.
     """
     if column not in df.columns:
         print(f"The column '{column}' does not exist in the DataFrame.")
         return None
+    elif index is not None:
+        return df.iloc[index.get(parameter, [])]
     else:
-        return df[df[column] == parameter]
+        return _select_rows(df, df[column] == parameter, copy)
 
 def clean_special_characters(df, column: str):
     """
@@ -145,11 +236,10 @@ def clean_special_characters(df, column: str):
     def clean_text(value):
         if not isinstance(value, str):
             return value  # Ignore if not a string
-        value = value.replace('&', 'E')              # Replace '&' with 'E'
-        value = re.sub(r'[^a-zA-Z0-9\s]', '', value) # Remove everything that is not a letter, number, or space
-        return value
+        value = value.replace('&', 'E')         # Replace '&' with 'E'
+        return _RE_NONALNUM.sub('', value)      # Remove everything that is not a letter, number, or space
 
-    df.loc[:, column] = df[column].apply(clean_text)
+    df.loc[:, column] = df[column].map(clean_text)
 
     return df
 
@@ -165,62 +255,145 @@ def lowercase_dataframe(df, column: str):
         print(f"The column '{column}' does not exist in the DataFrame.")
         return None
 
-    df[column] = df[column].apply(lambda x: x.lower() if isinstance(x, str) else x)
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        # Only the categories need lowercasing; the column stays categorical unless categories merge
+        df[column] = df[column].map(lambda x: x.lower() if isinstance(x, str) else x)
+        return df
+
+    try:
+        lowered = df[column].str.lower()
+    except AttributeError:
+        return df  # No string values to convert
+
+    # Non-string entries come back as NaN from .str, so keep their original values
+    df[column] = lowered.where(lowered.notna(), df[column])
     return df
 
+if _HAS_NUMBA:
+    @njit(parallel=True, cache=True)
+    def _fixed_width_digits(buffer, offsets, out):
+        # Copy the ASCII digits of each value into its row of `out` (pre-filled with '0'),
+        # right-aligned when there are fewer digits than the row width, trimmed otherwise
+        size = out.shape[1]
+        for i in prange(out.shape[0]):
+            start, end = offsets[i], offsets[i + 1]
+            count = 0
+            for j in range(start, end):
+                if 48 <= buffer[j] <= 57:
+                    count += 1
+            pos = size - count if count < size else 0
+            for j in range(start, end):
+                if pos >= size:
+                    break
+                if 48 <= buffer[j] <= 57:
+                    out[i, pos] = buffer[j]
+                    pos += 1
+
+def _format_digits_numba(docs, size: int):
+    """
+    Keeps only the digits of each value, padded with leading zeros or trimmed to `size`,
+    using the numba kernel.
+
+    :param docs: Series of strings (nulls allowed, they come back as zeros).
+    :param size: Desired size of each value.
+    :return: Series of formatted strings, or None if numba is not installed or the values
+             are not pure ASCII (non-ASCII digits are only handled by the regex path).
+    """
+    if not _HAS_NUMBA or size <= 0:
+        return None
+
+    values = docs.fillna('').tolist()
+    try:
+        buffer = ''.join(values).encode('ascii')
+    except UnicodeEncodeError:
+        return None
+
+    offsets = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in values], out=offsets[1:])
+    out = np.full((len(values), size), ord('0'), dtype=np.uint8)
+    _fixed_width_digits(np.frombuffer(buffer, dtype=np.uint8), offsets, out)
+
+    return pd.Series(out.view(f'S{size}').ravel().astype(str), index=docs.index, dtype=object)
+
+def _format_digits(docs, size: int):
+    """
+    Keeps only the digits of each value, padded with leading zeros or trimmed to `size`.
+    Uses the numba kernel for large inputs when possible, otherwise a Series.str chain.
+
+    :param docs: Series of strings.
+    :param size: Desired size of each value.
+    :return: Series of formatted strings.
+    """
+    formatted = _format_digits_numba(docs, size) if len(docs) >= _NUMBA_MIN_ROWS else None
+    if formatted is None:
+        formatted = docs.str.replace(_RE_NONDIGIT, '', regex=True).str.zfill(size).str.slice(0, size)
+    return formatted
+
+def _empty_documents(docs):
+    """
+    Flags the values format_document keeps as empty: nulls and, after stripping,
+    "", "nan" and "none" (case-insensitive).
+
+    :param docs: Series of strings.
+    :return: Boolean Series, True for empty values.
+    """
+    return docs.isna() | docs.str.strip().str.lower().isin(["", "nan", "none"])
+
 def format_document(df, column: str, size: int):
     """
     Formats numeric documents (CPF or CNPJ) by removing invalid characters
     and adjusting the size with leading zeros or right trimming.
-    Keeps empty values as NaN.
+    Keeps empty values as NaN. Categorical columns have their categories formatted.
 
     :param df: DataFrame containing the documents to format.
     :param column: Column name with the documents to format.
     :param size: Desired size of the formatted document.
-    :return: DataFrame with formatted documents.
+    :return: DataFrame with formatted documents. The other columns share data with the input,
+             so editing their cells in place also changes the input DataFrame.
     """
     if column not in df.columns:
         print(f"⚠ The column '{column}' does not exist in the DataFrame.")
         return None
 
-    df = df.copy()
+    df = df.copy(deep=False)  # Only the formatted column gets new data
 
-    def process(doc):
-        # If null or empty, return NaN (keep as empty)
-        if pd.isna(doc) or str(doc).strip().lower() in ["", "nan", "none"]:
-            return None
+    def process(values):
+        docs = values.astype(_STRING_DTYPE).str.strip()
 
-        # Convert to string and clean non-numeric characters
-        doc_str = str(doc).strip()
-        doc_numeric = re.sub(r'\D', '', doc_str)
+        # Null or empty values are kept as empty
+        empty = _empty_documents(docs)
 
-        # Adjust size as needed
-        if len(doc_numeric) < size:
-            doc_numeric = doc_numeric.zfill(size)
-        elif len(doc_numeric) > size:
-            doc_numeric = doc_numeric[:size]
+        # Clean non-numeric characters and adjust size with leading zeros or right trimming
+        docs = _format_digits(docs, size)
 
-        return doc_numeric
+        return docs.astype(object).where(~empty, None)
 
-    df[column] = df[column].apply(process)
+    if isinstance(df[column].dtype, pd.CategoricalDtype):
+        # Only the categories need formatting; the column stays categorical unless categories merge
+        categories = df[column].cat.categories
+        df[column] = df[column].map(dict(zip(categories, process(pd.Series(categories)))))
+    else:
+        df[column] = process(df[column])
     return df
 
-def drop_column(df, column: str):
+def drop_column(df, column: str, copy: bool = False):
     """
     Removes a column from the DataFrame, if it exists.
 
     :param df: The original DataFrame.
     :param column: The name of the column to be removed.
+    :param copy: If False, the remaining columns share data with the original DataFrame.
     :return: DataFrame without the specified column.
     """
     if column in df.columns:
-        df = df.drop(columns=[column])
+        df = df.copy(deep=copy)
+        del df[column]
     else:
         return None
     
     return df
 
-def filter_by_different_char_count(df, column: str, char_count: int) -> pd.DataFrame:
+def filter_by_different_char_count(df, column: str, char_count: int, copy: bool = False) -> pd.DataFrame:
     """
     Filters the DataFrame, returning only records where the character count
     in the specified column is different from the given value.
@@ -228,59 +401,95 @@ def filter_by_different_char_count(df, column: str, char_count: int) -> pd.DataF
     :param df: The original DataFrame.
     :param column: The name of the column to be evaluated.
     :param char_count: The character count to be avoided (will be removed if equal).
+    :param copy: If False and no record is removed, the result shares data with the original DataFrame.
     :return: A new DataFrame with records where the length of the column values
              is different from the specified count.
     """
     # Check if the column exists in the DataFrame
     if column not in df.columns:
         raise ValueError(f"The column '{column}' does not exist in the DataFrame.")
-    df[column] = df[column].astype(str)
-    filter_mask = df[column].apply(len) != char_count
-    return df[filter_mask]
+    filter_mask = df[column].astype(str).str.len() != char_count
+    return _select_rows(df, filter_mask, copy)
 
 def limit_column_size(df, column: str, limit: int):
     """
     Limits the size of the values in a DataFrame column.
+    Empty values are kept as missing instead of being converted to text.
 
     :param df: The input DataFrame
     :param column: Name of the column to be truncated
     :param limit: Maximum number of characters allowed
-    :return: A copy of the DataFrame with the adjusted column
+    :return: DataFrame with the adjusted column. The other columns share data with the input,
+             so editing their cells in place also changes the input DataFrame.
     """
-    df_copy = df.copy()
+    df_copy = df.copy(deep=False)  # Only the truncated column gets new data
 
     if column not in df_copy.columns:
         raise ValueError(f"The column '{column}' does not exist in the DataFrame.")
 
-    df_copy[column] = df_copy[column].astype(str)
-
-    df_copy[column] = df_copy[column].apply(lambda x: x[:limit] if x else x)
+    df_copy[column] = df_copy[column].astype(_STRING_DTYPE).str.slice(0, limit)
 
     return df_copy
 
 def format_phone_number(df, column: str):
     """
-    Formats phone numbers in a DataFrame column to contain only 12 numeric digits.
-    Removes any non-numeric characters, pads with leading zeros, or trims excess.
+    Formats phone numbers in a DataFrame column to contain only numeric digits.
+    Removes any non-numeric characters.
 
     :param df: Input DataFrame
     :param column: Name of the column with phone numbers
-    :return: DataFrame with the formatted column
+    :return: DataFrame with the formatted column. The other columns share data with the input,
+             so editing their cells in place also changes the input DataFrame.
+    """
+    if column not in df.columns:
+        print(f"The column '{column}' does not exist in the DataFrame.")
+        return None
+
+    df = df.copy(deep=False)  # Only the formatted column gets new data
+    df[column] = df[column].astype(str).str.replace(_RE_NONDIGIT, '', regex=True)  # Remove everything that is not a number
+    return df
+
+def transform_column(df, column: str, strip: bool = False, clean_special: bool = False,
+                     lower: bool = False, digits_size: int | None = None, limit: int | None = None):
+    """
+    Applies several cleaning steps to a column in a single pass, instead of calling
+    strip_dataframe, clean_special_characters, lowercase_dataframe, format_document
+    and limit_column_size one after the other. The steps run in that order.
+    The column is converted to text; empty values are kept as missing.
+
+    :param df: The input DataFrame.
+    :param column: Name of the column to be processed.
+    :param strip: Strips whitespace from the beginning and end of each value.
+    :param clean_special: Replaces '&' with 'E', then keeps only letters, numbers, and spaces.
+    :param lower: Converts the values to lowercase.
+    :param digits_size: If given, keeps only digits, padded with leading zeros or trimmed to this size.
+                        Values format_document keeps as empty ("", "nan", "none", blanks) become missing.
+    :param limit: If given, maximum number of characters allowed.
+    :return: DataFrame with the processed column, or None if the column does not exist.
+             The other columns share data with the input, so editing their cells in place
+             also changes the input DataFrame.
     """
     if column not in df.columns:
         print(f"The column '{column}' does not exist in the DataFrame.")
         return None
 
-    df = df.copy()
-    df[column] = df[column].astype(str)  # Ensure values are strings
+    df = df.copy(deep=False)  # Only the processed column gets new data
 
-    def process_phone(phone):
-        # Remove everything that is not a number
-        clean_phone = re.sub(r'\D', '', phone)
+    values = df[column].astype(_STRING_DTYPE)
 
-        return clean_phone
+    if strip:
+        values = values.str.strip()
+    if clean_special:
+        values = values.str.replace('&', 'E', regex=False).str.replace(_RE_NONALNUM, '', regex=True)
+    if lower:
+        values = values.str.lower()
+    if digits_size is not None:
+        empty = _empty_documents(values)
+        values = _format_digits(values, digits_size).astype(_STRING_DTYPE).mask(empty)
+    if limit is not None:
+        values = values.str.slice(0, limit)
 
-    df[column] = df[column].apply(process_phone)
+    df[column] = values
     return df
 
 def rename_column(df, current_name: str, new_name: str):
@@ -290,13 +499,13 @@ def rename_column(df, current_name: str, new_name: str):
     :param df: The DataFrame containing the column to rename.
     :param current_name: The current name of the column.
     :param new_name: The new name for the column.
-    :return: DataFrame with the renamed column.
+    :return: DataFrame with the renamed column. It shares data with the input,
+             so editing its cells in place also changes the input DataFrame.
     """
-    try:
-        if current_name not in df.columns:
-            print(f"The column '{current_name}' does not exist in the DataFrame.")
-            raise Exception
-        renamed_df = df.rename(columns={current_name: new_name})
-        return renamed_df
-    except Exception as e:
-        print(f'Error renaming column: {e}')
+    if current_name not in df.columns:
+        print(f"The column '{current_name}' does not exist in the DataFrame.")
+        return None
+
+    renamed_df = df.copy(deep=False)  # Only the column labels change, the data is shared
+    renamed_df.rename(columns={current_name: new_name}, inplace=True)
+    return renamed_df